@@ -149,8 +149,10 @@ class Integration(Resource):
             if status.success and 'code' in params:
                 if hasattr(handler, 'handler_storage'):
                     # attach storage if exists
-                    export = handler.handler_storage.export_files()
-                    if export:
+                    export_fd = handler.handler_storage.export_files()
+                    if export_fd is not None:
+                        with export_fd:
+                            export = export_fd.read()
                         # encrypt with flask secret key
                         encrypted = encrypt(export, secret_key)
                         resp['storage'] = encrypted.decode()
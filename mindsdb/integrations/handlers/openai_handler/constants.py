@@ -10,11 +10,20 @@ COMPLETION_LEGACY_MODELS = COMPLETION_LEGACY_BASE_MODELS + \
                         tuple(f'text-{model}-001' for model in COMPLETION_LEGACY_BASE_MODELS) + \
                         ('text-davinci-002', 'text-davinci-003')
 
-EMBEDDING_MODELS = ('text-embedding-ada-002',) + \
-                tuple(f'text-similarity-{model}-001' for model in COMPLETION_LEGACY_BASE_MODELS) + \
-                tuple(f'text-search-{model}-query-001' for model in COMPLETION_LEGACY_BASE_MODELS) + \
-                tuple(f'text-search-{model}-doc-001' for model in COMPLETION_LEGACY_BASE_MODELS) + \
-                tuple(f'code-search-{model}-text-001' for model in COMPLETION_LEGACY_BASE_MODELS) + \
-                tuple(f'code-search-{model}-code-001' for model in COMPLETION_LEGACY_BASE_MODELS)
+EMBEDDING_MODELS = (
+    'text-embedding-ada-002',
+    *(
+        f'{prefix}-{model}-{suffix}'
+        for prefix, suffix in (
+            ('text-similarity', '001'),
+            ('text-search', 'query-001'),
+            ('text-search', 'doc-001'),
+            ('code-search', 'text-001'),
+            ('code-search', 'code-001'),
+        )
+        for model in COMPLETION_LEGACY_BASE_MODELS
+    )
+)
 
-ALL_MODELS = list(set(CHAT_MODELS + COMPLETION_MODELS + COMPLETION_LEGACY_MODELS + EMBEDDING_MODELS))  # noqa
\ No newline at end of file
+# deduplicated, in order of declaration
+ALL_MODELS = tuple(dict.fromkeys(CHAT_MODELS + COMPLETION_MODELS + COMPLETION_LEGACY_MODELS + EMBEDDING_MODELS))
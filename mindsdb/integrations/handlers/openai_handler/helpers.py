@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Iterable, List, Optional
 import random
 import time
 import math
@@ -126,7 +126,7 @@ def count_tokens(messages, encoder, model_name='gpt-3.5-turbo-0301'):
         raise NotImplementedError(f"""_count_tokens() is not presently implemented for model {model_name}.""")
 
 
-def get_available_models(api_key: str, all_models: List, finetune_suffix: Optional[str] = None) -> List[str]:
+def get_available_models(api_key: str, all_models: Iterable[str], finetune_suffix: Optional[str] = None) -> List[str]:
     """
         Helper method that returns available models for
             - a given API key and
@@ -139,7 +139,7 @@ def get_available_models(api_key: str, all_models: List, finetune_suffix: Option
             return False
 
     api_base = os.environ.get('OPENAI_API_BASE', OPENAI_API_BASE)
-    models = all_models
+    models = list(all_models)
     user_models = [m.openai_id for m in openai.Model.list(api_key=api_key, api_base=api_base).data]
     if finetune_suffix is not None:
         user_models = list(filter(_get_user_fts, user_models))
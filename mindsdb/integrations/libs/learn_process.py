@@ -117,6 +117,7 @@ def learn_process(payload, dataframe):
         set_active = payload['set_active']
         class_path = (payload['handler_meta']['module_path'], payload['handler_meta']['class_name'])
 
+        modelStorage = None
         try:
             target = problem_definition.get('target', None)
             training_data_df = None
@@ -189,6 +190,7 @@ def learn_process(payload, dataframe):
                     problem_definition['base_model_id'] = base_predictor_id
                     ml_handler.finetune(df=training_data_df, args=problem_definition)
 
+            modelStorage.flush()
             predictor_record.status = PREDICTOR_STATUS.COMPLETE
             predictor_record.active = set_active
             db.session.commit()
@@ -208,6 +210,13 @@ def learn_process(payload, dataframe):
             print(traceback.format_exc())
             error_message = format_exception_error(e)
 
+            if modelStorage is not None:
+                # commit training state which may be not committed yet
+                try:
+                    modelStorage.flush()
+                except Exception:
+                    db.session.rollback()
+
             predictor_record = db.Predictor.query.with_for_update().get(predictor_id)
             predictor_record.data = {"error": error_message}
             predictor_record.status = PREDICTOR_STATUS.ERROR
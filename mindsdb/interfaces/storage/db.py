@@ -1,6 +1,7 @@
 import datetime
 import json
 import os
+from contextlib import contextmanager
 from typing import Dict, List
 
 import numpy as np
@@ -79,6 +80,21 @@ def serializable_insert(record: Base, try_count: int = 100):
             commited = True
 
 
+@contextmanager
+def no_expire_on_commit():
+    """Disable expiration of the session's instances on commit inside the context.
+    Useful for series of small commits of the same record: loaded attributes stay
+    valid and the record is not reloaded from the database after each commit.
+    """
+    current_session = session()
+    expire_on_commit = current_session.expire_on_commit
+    current_session.expire_on_commit = False
+    try:
+        yield
+    finally:
+        current_session.expire_on_commit = expire_on_commit
+
+
 # Source: https://stackoverflow.com/questions/26646362/numpy-array-is-not-json-serializable
 class NumpyEncoder(json.JSONEncoder):
     """Special json encoder for numpy types"""
@@ -114,6 +130,8 @@ class Json(types.TypeDecorator):
     """Float Type that replaces commas with  dots on input"""
 
     impl = types.String
+    # type has no state, so it is safe to cache statements with it
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):  # insert
         return json.dumps(value, cls=NumpyEncoder) if value is not None else None
@@ -1,5 +1,6 @@
 import os
 import io
+import time
 import shutil
 import tarfile
 import hashlib
@@ -41,7 +42,9 @@ RESOURCE_GROUP = RESOURCE_GROUP()
 
 DIR_LOCK_FILE_NAME = 'dir.lock'
 DIR_LAST_MODIFIED_FILE_NAME = 'last_modified.txt'
-SERVICE_FILES_NAMES = (DIR_LOCK_FILE_NAME, DIR_LAST_MODIFIED_FILE_NAME)
+SERVICE_FILES_NAMES = frozenset((DIR_LOCK_FILE_NAME, DIR_LAST_MODIFIED_FILE_NAME))
+# local copy of the resource is considered as actual during this time (seconds) after pull/push
+PULL_MAX_AGE = 30
 
 
 def copy(src, dst):
@@ -422,6 +425,8 @@ class FileStorage:
         self.folder_path = self.resource_group_path / self.folder_name
         if self.folder_path.exists() is False:
             self.folder_path.mkdir(parents=True, exist_ok=True)
+        # time of last sync with remote storage
+        self._last_pull_ts = None
 
     @profiler.profile()
     def push(self, compression_level: int = 9):
@@ -435,6 +440,7 @@ class FileStorage:
             str(self.resource_group_path),
             compression_level=compression_level
         )
+        self._last_pull_ts = time.monotonic()
 
     @profiler.profile()
     def push_path(self, path, compression_level: int = 9):
@@ -450,12 +456,26 @@ class FileStorage:
             )
         except (FileNotFoundError, S3ClientError):
             pass
+        else:
+            self._last_pull_ts = time.monotonic()
 
     @profiler.profile()
     def pull_path(self, path):
         # TODO implement pull per element
         self.pull()
 
+    @profiler.profile()
+    def pull_path_if_stale(self, path, max_age: float = PULL_MAX_AGE):
+        """Pull path only if it was not synced with remote storage during last {max_age} seconds
+
+        Args:
+            path (str): path to pull
+            max_age (float): max age of the local copy in seconds
+        """
+        if self._last_pull_ts is not None and time.monotonic() - self._last_pull_ts < max_age:
+            return
+        self.pull_path(path)
+
     @profiler.profile()
     def file_set(self, name, content):
         if self.sync is True:
@@ -1,9 +1,20 @@
 import os
 import re
+import copy
+import posixpath
 import io
+import time
+import shutil
+import hashlib
+import threading
 import zipfile
-from typing import Union
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, cached_property
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
 
+from sqlalchemy import inspect
 from sqlalchemy.orm.attributes import flag_modified
 
 import mindsdb.interfaces.storage.db as db
@@ -12,17 +23,199 @@ from .fs import RESOURCE_GROUP, FileStorageFactory, SERVICE_FILES_NAMES
 from .json import get_json_storage
 
 
+# min interval (in seconds) between commits of the training state
+TRAINING_STATE_FLUSH_INTERVAL = 1
+
+# exported archive is kept in memory until it exceeds this size, then it is moved to disk
+EXPORT_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+EXPORT_COMPRESS_LEVEL = 1
+EXPORT_READ_CHUNK_SIZE = 4 * 1024 * 1024
+# files which are already compressed, they are stored in exported archive as is
+INCOMPRESSIBLE_EXTS = frozenset((
+    '.pt', '.bin', '.onnx', '.safetensors', '.parquet', '.gz', '.zip', '.png', '.jpg', '.mp4', '.zst'
+))
+
+# lifetime (in seconds) of cached rarely changed values: model columns
+INFO_CACHE_TTL = 30
+# max number of cached values, the oldest values are removed first
+INFO_CACHE_MAX_SIZE = 1024
+
+_FOLDER_NAME_RE = re.compile(r'[^a-zA-Z0-9_]+')
+
+# (resource_group, resource_id, name) -> (time of caching, value)
+_INFO_CACHE: Dict[Tuple[str, int, str], Tuple[float, Any]] = {}
+# cache is used by threads of http api
+_INFO_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=512)
+def _convert_name(name: str) -> str:
+    """Convert name of the folder to the form that is safe to use in the file system
+
+    Args:
+        name (str): name of the folder
+
+    Returns:
+        str: converted name
+    """
+    return _FOLDER_NAME_RE.sub('_', name.lower().replace(' ', '_'))
+
+
+def _info_cache_get(key: Tuple[str, int, str]) -> Optional[Any]:
+    """Get value from cache
+
+    Args:
+        key (Tuple[str, int, str]): resource group, resource id and name of the value
+
+    Returns:
+        Optional[Any]: copy of cached value, or None if there is no actual value in cache
+    """
+    with _INFO_CACHE_LOCK:
+        item = _INFO_CACHE.get(key)
+        if item is None:
+            return None
+        ts, value = item
+        if time.monotonic() - ts >= INFO_CACHE_TTL:
+            _INFO_CACHE.pop(key, None)
+            return None
+    # copy, because caller may modify the value. Cached value itself is never changed, so lock is not needed
+    return copy.deepcopy(value)
+
+
+def _info_cache_set(key: Tuple[str, int, str], value: Any) -> None:
+    """Put value to cache. Expired values are removed, and then the oldest values
+    if size of the cache exceeds INFO_CACHE_MAX_SIZE
+
+    Args:
+        key (Tuple[str, int, str]): resource group, resource id and name of the value
+        value (Any): value to cache, None is not cached
+    """
+    if value is None:
+        return
+    value = copy.deepcopy(value)
+    with _INFO_CACHE_LOCK:
+        now = time.monotonic()
+        # values are in order of caching, so expired ones are at the start
+        _INFO_CACHE.pop(key, None)
+        while len(_INFO_CACHE) > 0:
+            oldest_key = next(iter(_INFO_CACHE))
+            ts, _ = _INFO_CACHE[oldest_key]
+            if now - ts < INFO_CACHE_TTL and len(_INFO_CACHE) < INFO_CACHE_MAX_SIZE:
+                break
+            del _INFO_CACHE[oldest_key]
+        _INFO_CACHE[key] = (now, value)
+
+
+def _info_cache_invalidate(resource_group: str, resource_id: int, name: Optional[str] = None) -> None:
+    """Remove values from cache
+
+    Args:
+        resource_group (str): resource group
+        resource_id (int): resource id
+        name (Optional[str]): name of the value, if not set - all values of the resource are removed
+    """
+    with _INFO_CACHE_LOCK:
+        if name is not None:
+            _INFO_CACHE.pop((resource_group, resource_id, name), None)
+            return
+        for key in list(_INFO_CACHE.keys()):
+            if key[0] == resource_group and key[1] == resource_id:
+                _INFO_CACHE.pop(key, None)
+
+
+def _folder_state(path: Path) -> str:
+    """Get state of the folder content which changes if any file inside is changed, added, removed or renamed.
+    Service files and mtime of the folder itself are ignored: they are changed on each push.
+
+    Args:
+        path (Path): path to the folder
+
+    Returns:
+        str: hash of relative path, size and mtime (ns) of each nested file and folder
+    """
+    base_len = len(os.fspath(path)) + 1
+    entries = []
+    dirs = [os.fspath(path)]
+    while dirs:
+        with os.scandir(dirs.pop()) as it:
+            for entry in it:
+                if entry.name in SERVICE_FILES_NAMES:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                entries.append(f'{entry.path[base_len:]}\0{stat.st_size}\0{stat.st_mtime_ns}')
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+    entries.sort()
+    return hashlib.sha256('\n'.join(entries).encode()).hexdigest()
+
+
+def _export_compress_type(abs_path: str) -> int:
+    """Get compression of the file in exported archive: already compressed files
+    (see INCOMPRESSIBLE_EXTS) are stored as is
+
+    Args:
+        abs_path (str): path to the file
+
+    Returns:
+        int: ZIP_STORED or ZIP_DEFLATED
+    """
+    if os.path.splitext(abs_path)[1].lower() in INCOMPRESSIBLE_EXTS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _zip_info_from_stat(arcname: str, file_stat: os.stat_result) -> zipfile.ZipInfo:
+    """Make zip member info for the file, the same as ZipInfo.from_file does, but from known stat of the file
+
+    Args:
+        arcname (str): name of the file in archive
+        file_stat (os.stat_result): stat of the file
+
+    Returns:
+        zipfile.ZipInfo: info of the member
+    """
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(file_stat.st_mtime)[0:6])
+    zinfo.external_attr = (file_stat.st_mode & 0xFFFF) << 16  # Unix attributes
+    zinfo.file_size = file_stat.st_size
+    return zinfo
+
+
+def _set_compress_level(zinfo: zipfile.ZipInfo, compress_level: int) -> None:
+    # attribute is public since python 3.13
+    if hasattr(zinfo, 'compress_level'):
+        zinfo.compress_level = compress_level
+    else:
+        zinfo._compresslevel = compress_level
+
+
 class ModelStorage:
     """
     This class deals with all model-related storage requirements, from setting status to storing artifacts.
     """
     def __init__(self, predictor_id):
-        storageFactory = FileStorageFactory(
+        self._storage_factory = FileStorageFactory(
             resource_group=RESOURCE_GROUP.PREDICTOR,
             sync=True
         )
-        self.fileStorage = storageFactory(predictor_id)
         self.predictor_id = predictor_id
+        self._rec = None
+        # training state updates which are not committed yet
+        self._pending = {}
+        self._last_flush_ts = 0.0
+        # state of the storage folder at the moment of last push
+        self._synced_state = None
+
+    @cached_property
+    def fileStorage(self):
+        # created on first access: json and db-only operations do not need the file storage
+        return self._storage_factory(self.predictor_id)
+
+    @cached_property
+    def _json_storage(self):
+        return get_json_storage(
+            resource_id=self.predictor_id,
+            resource_group=RESOURCE_GROUP.PREDICTOR
+        )
 
     # -- fields --
 
@@ -39,10 +232,29 @@ class ModelStorage:
         Raises:
             KeyError: if `check_exists` is True and model does not exists
         """
-        model_record = db.Predictor.query.get(self.predictor_id)
-        if check_exists is True and model_record is None:
+        if self._rec is not None:
+            # record may belong to another session: after db.init() or if it is used in other thread
+            state = inspect(self._rec)
+            if state.expired or state.detached or self._rec not in db.session:
+                self._rec = None
+        if self._rec is None:
+            self._rec = db.session.get(db.Predictor, self.predictor_id)
+        if check_exists is True and self._rec is None:
             raise KeyError('Model does not exists')
-        return model_record
+        return self._rec
+
+    def _get_stored_field(self, field: str) -> Any:
+        """Get value of the model json field as it is stored in db. Value of the record can not be used
+        for comparison: callers may change it (or its nested values) in place
+
+        Args:
+            field (str): name of the field
+
+        Returns:
+            Any: value of the field
+        """
+        column = getattr(db.Predictor, field)
+        return db.session.query(column).filter(db.Predictor.id == self.predictor_id).scalar()
 
     def get_info(self):
         rec = self._get_model_record(self.predictor_id)
@@ -61,6 +273,9 @@ class ModelStorage:
             model_record.data = data
         else:
             model_record.data.update(data)
+        if model_record.data == self._get_stored_field('data'):
+            # nothing changed, skip UPDATE
+            return
         flag_modified(model_record, 'data')
         db.session.commit()
 
@@ -75,33 +290,78 @@ class ModelStorage:
             model_record.learn_args = data
         else:
             model_record.learn_args.update(data)
+        if model_record.learn_args == self._get_stored_field('learn_args'):
+            # nothing changed, skip UPDATE
+            return
         flag_modified(model_record, 'learn_args')
         db.session.commit()
 
     def status_set(self, status, status_info=None):
         rec = self._get_model_record(self.predictor_id)
+        self._apply_pending(rec)
         rec.status = status
         if status_info is not None:
             rec.data = status_info
         db.session.commit()
 
     def training_state_set(self, current_state_num=None, total_states=None, state_name=None):
-        rec = self._get_model_record(self.predictor_id)
+        """Set training state. Change of the phase (number or name) is committed immediately, other updates
+        are accumulated and committed not often than once in TRAINING_STATE_FLUSH_INTERVAL seconds,
+        use `flush` to commit them immediately
+        """
+        current_state_num_prev, _, state_name_prev = self.training_state_get()
+        phase_changed = (
+            (current_state_num is not None and current_state_num != current_state_num_prev)
+            or (state_name is not None and state_name != state_name_prev)
+        )
         if current_state_num is not None:
-            rec.training_phase_current = current_state_num
+            self._pending['training_phase_current'] = current_state_num
         if total_states is not None:
-            rec.training_phase_total = total_states
+            self._pending['training_phase_total'] = total_states
         if state_name is not None:
-            rec.training_phase_name = state_name
-        db.session.commit()
+            self._pending['training_phase_name'] = state_name
+        if phase_changed:
+            self.flush()
+        else:
+            self._maybe_flush()
+
+    def _apply_pending(self, rec: db.Predictor) -> None:
+        for key, value in self._pending.items():
+            setattr(rec, key, value)
+        self._pending.clear()
+        self._last_flush_ts = time.monotonic()
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush_ts >= TRAINING_STATE_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit accumulated training state updates
+        """
+        if len(self._pending) == 0:
+            return
+        rec = self._get_model_record(self.predictor_id)
+        self._apply_pending(rec)
+        # frequent commits of the training state: keep the record loaded, do not re-select it after each commit
+        with db.no_expire_on_commit():
+            db.session.commit()
 
     def training_state_get(self):
         rec = self._get_model_record(self.predictor_id)
-        return [rec.training_phase_current, rec.training_phase_total, rec.training_phase_name]
+        state = [rec.training_phase_current, rec.training_phase_total, rec.training_phase_name]
+        for i, key in enumerate(('training_phase_current', 'training_phase_total', 'training_phase_name')):
+            if key in self._pending:
+                state[i] = self._pending[key]
+        return state
 
     def columns_get(self):
-        rec = self._get_model_record(self.predictor_id)
-        return rec.dtype_dict
+        key = (RESOURCE_GROUP.PREDICTOR, self.predictor_id, 'dtype_dict')
+        columns = _info_cache_get(key)
+        if columns is None:
+            rec = self._get_model_record(self.predictor_id)
+            columns = rec.dtype_dict
+            _info_cache_set(key, columns)
+        return columns
 
     def columns_set(self, columns):
         # columns: {name: dtype}
@@ -109,6 +369,7 @@ class ModelStorage:
         rec = self._get_model_record(self.predictor_id)
         rec.dtype_dict = columns
         db.session.commit()
+        _info_cache_invalidate(RESOURCE_GROUP.PREDICTOR, self.predictor_id, 'dtype_dict')
 
     # files
 
@@ -117,21 +378,25 @@ class ModelStorage:
 
     def file_set(self, name, content):
         self.fileStorage.file_set(name, content)
+        self._synced_state = None
 
     def folder_get(self, name):
         # pull folder and return path
-        name = name.lower().replace(' ', '_')
-        name = re.sub(r'([^a-z^A-Z^_\d]+)', '_', name)
+        name = _convert_name(name)
 
         self.fileStorage.pull_path(name)
         return str(self.fileStorage.get_path(name))
 
     def folder_sync(self, name):
         # sync abs path
-        name = name.lower().replace(' ', '_')
-        name = re.sub(r'([^a-z^A-Z^_\d]+)', '_', name)
+        name = _convert_name(name)
 
+        # whole storage folder is pushed, skip if nothing is changed in it since last push
+        state = _folder_state(self.fileStorage.folder_path)
+        if state == self._synced_state:
+            return
         self.fileStorage.push_path(name)
+        self._synced_state = state
 
     def file_list(self):
         ...
@@ -142,18 +407,10 @@ class ModelStorage:
     # jsons
 
     def json_set(self, name, data):
-        json_storage = get_json_storage(
-            resource_id=self.predictor_id,
-            resource_group=RESOURCE_GROUP.PREDICTOR
-        )
-        return json_storage.set(name, data)
+        return self._json_storage.set(name, data)
 
     def json_get(self, name):
-        json_storage = get_json_storage(
-            resource_id=self.predictor_id,
-            resource_group=RESOURCE_GROUP.PREDICTOR
-        )
-        return json_storage.get(name)
+        return self._json_storage.get(name)
 
     def json_list(self):
         ...
@@ -163,11 +420,8 @@ class ModelStorage:
 
     def delete(self):
         self.fileStorage.delete()
-        json_storage = get_json_storage(
-            resource_id=self.predictor_id,
-            resource_group=RESOURCE_GROUP.PREDICTOR
-        )
-        json_storage.clean()
+        self._json_storage.clean()
+        _info_cache_invalidate(RESOURCE_GROUP.PREDICTOR, self.predictor_id)
 
 
 class HandlerStorage:
@@ -179,19 +433,29 @@ class HandlerStorage:
         args = {}
         if root_dir is not None:
             args['root_dir'] = root_dir
-        storageFactory = FileStorageFactory(
+        self._storage_factory = FileStorageFactory(
             resource_group=RESOURCE_GROUP.INTEGRATION,
             sync=False,
             **args
         )
-        self.fileStorage = storageFactory(integration_id)
         self.integration_id = integration_id
-        self.is_temporal = is_temporal
         # do not sync with remote storage
-
-    def __convert_name(self, name):
-        name = name.lower().replace(' ', '_')
-        return re.sub(r'([^a-z^A-Z^_\d]+)', '_', name)
+        self.is_temporal = is_temporal
+        self._rec = None
+        # state of the storage folder at the moment of last push
+        self._synced_state = None
+
+    @cached_property
+    def fileStorage(self):
+        # created on first access: json and db-only operations do not need the file storage
+        return self._storage_factory(self.integration_id)
+
+    @cached_property
+    def _json_storage(self):
+        return get_json_storage(
+            resource_id=self.integration_id,
+            resource_group=RESOURCE_GROUP.INTEGRATION
+        )
 
     def is_empty(self):
         """ check if storage directory is empty
@@ -199,14 +463,35 @@ class HandlerStorage:
             Returns:
                 bool: true if dir is empty
         """
-        for path in self.fileStorage.folder_path.iterdir():
-            if path.is_file() and path.name in SERVICE_FILES_NAMES:
-                continue
-            return False
+        with os.scandir(self.fileStorage.folder_path) as it:
+            for entry in it:
+                if entry.name in SERVICE_FILES_NAMES and entry.is_file(follow_symlinks=False):
+                    continue
+                return False
         return True
 
+    def _get_integration_record(self) -> db.Integration:
+        """Get integration record, it is loaded once and reused while it is not expired
+
+        Returns:
+            db.Integration: integration record
+
+        Raises:
+            KeyError: if integration does not exists
+        """
+        if self._rec is not None:
+            # record may belong to another session: after db.init() or if it is used in other thread
+            state = inspect(self._rec)
+            if state.expired or state.detached or self._rec not in db.session:
+                self._rec = None
+        if self._rec is None:
+            self._rec = db.session.get(db.Integration, self.integration_id)
+        if self._rec is None:
+            raise KeyError("Can't find integration")
+        return self._rec
+
     def get_connection_args(self):
-        rec = db.Integration.query.get(self.integration_id)
+        rec = self._get_integration_record()
         return rec.data
 
     def update_connection_args(self, connection_args: dict) -> None:
@@ -215,9 +500,7 @@ class HandlerStorage:
         Args:
             connection_args (dict): new connection args
         """
-        rec = db.Integration.query.get(self.integration_id)
-        if rec is None:
-            raise KeyError("Can't find integration")
+        rec = self._get_integration_record()
         rec.data = connection_args
         db.session.commit()
 
@@ -231,6 +514,7 @@ class HandlerStorage:
         self.fileStorage.file_set(name, content)
         if not self.is_temporal:
             self.fileStorage.push_path(name)
+            self._synced_state = None
 
     def file_list(self):
         ...
@@ -245,7 +529,7 @@ class HandlerStorage:
 
         :param name: name of the folder
         '''
-        name = self.__convert_name(name)
+        name = _convert_name(name)
 
         self.fileStorage.pull_path(name)
         return str(self.fileStorage.get_path(name))
@@ -254,24 +538,22 @@ class HandlerStorage:
         # sync abs path
         if self.is_temporal:
             return
-        name = self.__convert_name(name)
+        name = _convert_name(name)
+
+        # whole storage folder is pushed, skip if nothing is changed in it since last push
+        state = _folder_state(self.fileStorage.folder_path)
+        if state == self._synced_state:
+            return
         self.fileStorage.push_path(name)
+        self._synced_state = state
 
     # jsons
 
     def json_set(self, name, content):
-        json_storage = get_json_storage(
-            resource_id=self.integration_id,
-            resource_group=RESOURCE_GROUP.INTEGRATION
-        )
-        return json_storage.set(name, content)
+        return self._json_storage.set(name, content)
 
     def json_get(self, name):
-        json_storage = get_json_storage(
-            resource_id=self.integration_id,
-            resource_group=RESOURCE_GROUP.INTEGRATION
-        )
-        return json_storage.get(name)
+        return self._json_storage.get(name)
 
     def json_list(self):
         ...
@@ -279,33 +561,88 @@ class HandlerStorage:
     def json_del(self, name):
         ...
 
-    def export_files(self) -> bytes:
+    def export_files(self) -> Union[IO[bytes], None]:
+        """Pack content of the storage to zip archive
+
+        Returns:
+            Union[IO[bytes], None]: file-like object with archive (positioned at the start), or None if storage is empty
+        """
         if self.is_empty():
             return None
-        folder_path = self.folder_get('')
-
-        zip_fd = io.BytesIO()
 
-        with zipfile.ZipFile(zip_fd, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(folder_path):
-                for file_name in files:
-                    if file_name in SERVICE_FILES_NAMES:
-                        continue
-                    abs_path = os.path.join(root, file_name)
-                    zipf.write(abs_path, os.path.relpath(abs_path, folder_path))
+        self.fileStorage.pull_path_if_stale('')
+        folder_path = self.fileStorage.folder_path
+
+        # arcname is the path without '{folder_path}/' prefix
+        base_len = len(os.fspath(folder_path)) + 1
+        # each file is stat'ed once: type of the entry is known from the directory listing
+        files = []
+        dirs = [os.fspath(folder_path)]
+        while dirs:
+            with os.scandir(dirs.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.name not in SERVICE_FILES_NAMES and entry.is_file():
+                        files.append((entry.path, entry.stat()))
+
+        zip_fd = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+        try:
+            with zipfile.ZipFile(zip_fd, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                # files are compressed by chunks while they are read, without loading them to memory
+                for abs_path, file_stat in files:
+                    zinfo = _zip_info_from_stat(abs_path[base_len:], file_stat)
+                    zinfo.compress_type = _export_compress_type(abs_path)
+                    _set_compress_level(zinfo, EXPORT_COMPRESS_LEVEL)
+                    # file is read by big chunks, so python's buffer is not needed.
+                    # zip64 is forced, because the file may grow while it is read
+                    with open(abs_path, 'rb', buffering=0) as src, zipf.open(zinfo, 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst, EXPORT_READ_CHUNK_SIZE)
+        except Exception:
+            # temporary file is not returned to the caller, so it is removed here
+            zip_fd.close()
+            raise
 
         zip_fd.seek(0)
-        return zip_fd.read()
+        return zip_fd
 
     def import_files(self, content: bytes):
+        """Unpack zip archive to the storage
 
+        Args:
+            content (bytes): zip archive
+        """
         folder_path = self.folder_get('')
 
-        zip_fd = io.BytesIO()
-        zip_fd.write(content)
-        zip_fd.seek(0)
-
-        with zipfile.ZipFile(zip_fd, 'r') as zip_ref:
-            zip_ref.extractall(folder_path)
+        # archive is read from the bytes directly, without copying them
+        with zipfile.ZipFile(io.BytesIO(content), 'r') as zip_ref:
+            # the first member of each directory is extracted sequentially, so all directories
+            # are created before the rest of members are extracted in parallel
+            seen_dirs = set()
+            sequential, parallel = [], []
+            for info in zip_ref.infolist():
+                dir_name = posixpath.dirname(info.filename.rstrip('/'))
+                if info.is_dir() or dir_name not in seen_dirs:
+                    seen_dirs.add(dir_name)
+                    sequential.append(info)
+                else:
+                    parallel.append(info)
+
+            for info in sequential:
+                zip_ref.extract(info, folder_path)
+
+        if len(parallel) > 0:
+            # zlib releases the GIL on decompression. ZipFile is not thread safe,
+            # so each worker reads its part of members using own ZipFile
+            max_workers = min(8, os.cpu_count() or 1, len(parallel))
+
+            def extract_members(members: List[zipfile.ZipInfo]) -> None:
+                with zipfile.ZipFile(io.BytesIO(content), 'r') as worker_zip_ref:
+                    for info in members:
+                        worker_zip_ref.extract(info, folder_path)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                parts = [parallel[i::max_workers] for i in range(max_workers)]
+                list(executor.map(extract_members, parts))
 
         self.folder_sync('')
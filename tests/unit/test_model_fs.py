@@ -0,0 +1,338 @@
+import tempfile
+import os
+import unittest
+import io
+import json
+import zipfile
+import tracemalloc
+import shutil
+from unittest import mock
+
+temp_dir = tempfile.mkdtemp(dir='/tmp/', prefix='model_fs_test_')
+os.environ['MINDSDB_STORAGE_DIR'] = os.environ.get('MINDSDB_STORAGE_DIR', temp_dir)
+os.environ['MINDSDB_DB_CON'] = 'sqlite:///' + os.path.join(os.environ['MINDSDB_STORAGE_DIR'], 'mindsdb.sqlite3.db') + '?check_same_thread=False&timeout=30'
+
+from sqlalchemy import text  # noqa
+
+from mindsdb.interfaces.storage import db   # noqa
+from mindsdb.migrations import migrate  # noqa
+from mindsdb.interfaces.storage import model_fs  # noqa
+from mindsdb.interfaces.storage.model_fs import ModelStorage, HandlerStorage  # noqa
+from mindsdb.interfaces.storage.fs import RESOURCE_GROUP  # noqa
+from mindsdb.interfaces.storage.json import get_json_storage  # noqa
+
+
+def get_committed_predictor(predictor_id):
+    with db.engine.connect() as connection:
+        return connection.execute(
+            text('select data, dtype_dict from predictor where id = :id'),
+            {'id': predictor_id}
+        ).fetchone()
+
+
+def get_committed_training_state(predictor_id):
+    # read with separate connection: only committed data is visible
+    with db.engine.connect() as connection:
+        return list(connection.execute(
+            text('select training_phase_current, training_phase_total, training_phase_name from predictor where id = :id'),
+            {'id': predictor_id}
+        ).fetchone())
+
+
+class TestModelStorage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        fdi, cfg_file = tempfile.mkstemp(prefix='mindsdb_conf_')
+        with os.fdopen(fdi, 'w') as fd:
+            json.dump({}, fd)
+        os.environ['MINDSDB_CONFIG_PATH'] = cfg_file
+
+        db.init()
+        migrate.migrate_to_head()
+
+    def create_predictor(self):
+        project = db.session.query(db.Project).filter_by(name='mindsdb').first()
+        predictor = db.Predictor(name='test_model', project_id=project.id)
+        db.session.add(predictor)
+        db.session.commit()
+        return predictor.id
+
+    @mock.patch.object(model_fs, 'TRAINING_STATE_FLUSH_INTERVAL', 60)
+    def test_training_state_phase_change_is_committed(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+
+        model_storage.training_state_set(current_state_num=1, total_states=5, state_name='Generating problem definition')
+        model_storage.training_state_set(current_state_num=2, total_states=5, state_name='Generating JsonAI')
+        assert get_committed_training_state(predictor_id) == [2, 5, 'Generating JsonAI']
+
+        # the same phase: update is not committed until flush
+        model_storage.training_state_set(current_state_num=2, total_states=6)
+        assert get_committed_training_state(predictor_id) == [2, 5, 'Generating JsonAI']
+        assert model_storage.training_state_get() == [2, 6, 'Generating JsonAI']
+
+        model_storage.flush()
+        assert get_committed_training_state(predictor_id) == [2, 6, 'Generating JsonAI']
+
+    @mock.patch.object(model_fs, 'TRAINING_STATE_FLUSH_INTERVAL', 60)
+    def test_status_set_commits_pending_training_state(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+
+        model_storage.training_state_set(current_state_num=1, total_states=5, state_name='Training model')
+        model_storage.training_state_set(total_states=4)
+        model_storage.status_set('complete')
+        assert get_committed_training_state(predictor_id) == [1, 4, 'Training model']
+
+    def test_record_of_previous_session(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+        model_storage.get_info()
+
+        # new session, the cached record belongs to the old one
+        db.init()
+        model_storage.update_data({'x': 1})
+        model_storage.columns_set({'a': 'integer'})
+
+        data, dtype_dict = get_committed_predictor(predictor_id)
+        assert json.loads(data) == {'x': 1}
+        assert json.loads(dtype_dict) == {'a': 'integer'}
+
+    def test_update_data_changed_in_place(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+        model_storage.update_data({'a': 1})
+
+        data = model_storage.get_info()['data']
+        data['a'] = 2
+        model_storage.update_data({'a': 2})
+        assert json.loads(get_committed_predictor(predictor_id)[0]) == {'a': 2}
+
+        # nothing changed
+        with mock.patch.object(db.session, 'commit') as commit:
+            model_storage.update_data({'a': 2})
+            commit.assert_not_called()
+
+    def test_update_learn_args_changed_in_place(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+        model_storage.update_learn_args({'using': {'a': 1}})
+
+        # nested value of the record is changed by the caller, as byom handler does
+        using_args = db.session.get(db.Predictor, predictor_id).learn_args['using']
+        using_args['engine_version'] = 2
+        model_storage.update_learn_args({'using': using_args})
+
+        with db.engine.connect() as connection:
+            learn_args = connection.execute(
+                text('select learn_args from predictor where id = :id'),
+                {'id': predictor_id}
+            ).scalar()
+        assert json.loads(learn_args) == {'using': {'a': 1, 'engine_version': 2}}
+
+    def test_json_changed_by_other_process(self):
+        predictor_id = self.create_predictor()
+        model_storage = ModelStorage(predictor_id)
+        model_storage.json_set('args', {'prompt_template': 'a'})
+        assert model_storage.json_get('args') == {'prompt_template': 'a'}
+
+        # the same as 'ALTER MODEL' does in web process, while model storage is used in predict process
+        json_storage = get_json_storage(resource_id=predictor_id, resource_group=RESOURCE_GROUP.PREDICTOR)
+        json_storage.set('args', {'prompt_template': 'b'})
+        assert model_storage.json_get('args') == {'prompt_template': 'b'}
+
+
+class TestInfoCache(unittest.TestCase):
+
+    @mock.patch.object(model_fs, 'INFO_CACHE_MAX_SIZE', 3)
+    def test_cache_size_is_limited(self):
+        model_fs._INFO_CACHE.clear()
+        for i in range(5):
+            model_fs._info_cache_set(('predictor', i, 'dtype_dict'), {'a': i})
+        assert len(model_fs._INFO_CACHE) == 3
+        assert model_fs._info_cache_get(('predictor', 0, 'dtype_dict')) is None
+        assert model_fs._info_cache_get(('predictor', 4, 'dtype_dict')) == {'a': 4}
+
+    def test_expired_values_are_removed(self):
+        model_fs._INFO_CACHE.clear()
+        model_fs._info_cache_set(('predictor', 1, 'dtype_dict'), {'a': 1})
+        with mock.patch.object(model_fs, 'INFO_CACHE_TTL', 0):
+            model_fs._info_cache_set(('predictor', 2, 'dtype_dict'), {'a': 2})
+        assert list(model_fs._INFO_CACHE) == [('predictor', 2, 'dtype_dict')]
+
+
+class TestHandlerStorage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        TestModelStorage.setUpClass()
+
+    def test_record_of_previous_session(self):
+        integration = db.Integration(name='test_integration', engine='test', data={'v': 1})
+        db.session.add(integration)
+        db.session.commit()
+        handler_storage = HandlerStorage(integration.id)
+        assert handler_storage.get_connection_args() == {'v': 1}
+
+        with db.engine.begin() as connection:
+            connection.execute(
+                text('update integration set data = :data where id = :id'),
+                {'data': json.dumps({'v': 2}), 'id': integration.id}
+            )
+
+        # new session, the cached record belongs to the old one
+        db.init()
+        assert handler_storage.get_connection_args() == {'v': 2}
+
+        handler_storage.update_connection_args({'v': 3})
+        with db.engine.connect() as connection:
+            data = connection.execute(
+                text('select data from integration where id = :id'),
+                {'id': integration.id}
+            ).scalar()
+        assert json.loads(data) == {'v': 3}
+
+    def test_import_files(self):
+        files = {
+            f'dir_{i % 3}/sub/file_{i}.txt': f'content {i}'.encode() * (i + 1)
+            for i in range(20)
+        }
+        files['top.txt'] = b'top'
+        zip_fd = io.BytesIO()
+        with zipfile.ZipFile(zip_fd, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for name, content in files.items():
+                zipf.writestr(name, content)
+
+        handler_storage = HandlerStorage(1001)
+        handler_storage.import_files(zip_fd.getvalue())
+
+        folder_path = handler_storage.folder_get('')
+        for name, content in files.items():
+            with open(os.path.join(folder_path, name), 'rb') as fd:
+                assert fd.read() == content
+
+    @mock.patch.object(model_fs, 'EXPORT_SPOOL_MAX_SIZE', 1024 * 1024)
+    def test_export_files(self):
+        handler_storage = HandlerStorage(1002)
+        folder_path = handler_storage.folder_get('')
+        files = {
+            'small.txt': b'small content',
+            'dir/model.pt': b'pt content' * 100,
+            'dir/sub/data.txt': b'data ' * 1000,
+        }
+        for name, content in files.items():
+            path = os.path.join(folder_path, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fd:
+                fd.write(content)
+        # big file is written by parts, to not keep it in memory
+        big_part = os.urandom(1024 * 1024)
+        with open(os.path.join(folder_path, 'dir', 'big.bin'), 'wb') as fd:
+            for _ in range(32):
+                fd.write(big_part)
+        handler_storage.folder_sync('')
+
+        tracemalloc.start()
+        try:
+            export_fd = handler_storage.export_files()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # neither the big file nor the archive is kept in memory, only a couple of read chunks
+        assert peak_memory < 4 * model_fs.EXPORT_READ_CHUNK_SIZE
+
+        with export_fd:
+            content = export_fd.read()
+
+        with zipfile.ZipFile(io.BytesIO(content)) as zipf:
+            assert zipf.testzip() is None
+            assert set(zipf.namelist()) == set(files) | {'dir/big.bin'}
+            assert zipf.getinfo('small.txt').compress_type == zipfile.ZIP_DEFLATED
+            assert zipf.getinfo('dir/sub/data.txt').compress_type == zipfile.ZIP_DEFLATED
+            assert zipf.getinfo('dir/model.pt').compress_type == zipfile.ZIP_STORED
+            assert zipf.getinfo('dir/big.bin').compress_type == zipfile.ZIP_STORED
+            # metadata is the same as zipfile makes for the files
+            for name in files:
+                expected_info = zipfile.ZipInfo.from_file(os.path.join(folder_path, name), name)
+                info = zipf.getinfo(name)
+                assert info.date_time == expected_info.date_time
+                assert info.external_attr == expected_info.external_attr
+                assert info.file_size == expected_info.file_size
+
+        imported_storage = HandlerStorage(1003)
+        imported_storage.import_files(content)
+        imported_path = imported_storage.folder_get('')
+        for name, file_content in files.items():
+            with open(os.path.join(imported_path, name), 'rb') as fd:
+                assert fd.read() == file_content
+        assert os.path.getsize(os.path.join(imported_path, 'dir', 'big.bin')) == 32 * 1024 * 1024
+
+    def test_export_files_empty(self):
+        handler_storage = HandlerStorage(1004)
+        assert handler_storage.export_files() is None
+
+    def test_export_files_error(self):
+        handler_storage = HandlerStorage(1005)
+        folder_path = handler_storage.folder_get('')
+        with open(os.path.join(folder_path, 'file.txt'), 'wb') as fd:
+            fd.write(b'content')
+
+        spooled_files = []
+        spooled_file_class = tempfile.SpooledTemporaryFile
+
+        def spooled_file(*args, **kwargs):
+            fd = spooled_file_class(*args, **kwargs)
+            spooled_files.append(fd)
+            return fd
+
+        with mock.patch.object(model_fs.tempfile, 'SpooledTemporaryFile', spooled_file), \
+                mock.patch.object(model_fs, '_export_compress_type', side_effect=OSError('read error')):
+            with self.assertRaises(OSError):
+                handler_storage.export_files()
+
+        assert len(spooled_files) == 1
+        assert spooled_files[0].closed
+
+    def test_export_files_position(self):
+        handler_storage = HandlerStorage(1006)
+        folder_path = handler_storage.folder_get('')
+        with open(os.path.join(folder_path, 'file.txt'), 'wb') as fd:
+            fd.write(b'content')
+
+        # the same way as the result is used in http api
+        export_fd = handler_storage.export_files()
+        assert export_fd.tell() == 0
+        with export_fd:
+            export = export_fd.read()
+        assert export_fd.closed
+
+        imported_storage = HandlerStorage(1007)
+        imported_storage.import_files(export)
+        with open(os.path.join(imported_storage.folder_get(''), 'file.txt'), 'rb') as fd:
+            assert fd.read() == b'content'
+
+    def test_folder_sync_same_size_replace(self):
+        handler_storage = HandlerStorage(1008)
+        folder_path = handler_storage.folder_get('')
+        file_path = os.path.join(folder_path, 'file.txt')
+        with open(file_path, 'wb') as fd:
+            fd.write(b'content 1')
+        # file with the same size and older mtime
+        source_path = os.path.join(temp_dir, 'source.txt')
+        with open(source_path, 'wb') as fd:
+            fd.write(b'content 2')
+        os.utime(source_path, ns=(0, 0))
+
+        with mock.patch.object(handler_storage.fileStorage, 'push_path') as push_path:
+            handler_storage.folder_sync('')
+            handler_storage.folder_sync('')
+            assert push_path.call_count == 1
+
+            shutil.copy2(source_path, file_path)
+            handler_storage.folder_sync('')
+            assert push_path.call_count == 2
+
+
+if __name__ == '__main__':
+    unittest.main()